@@ -6,9 +6,9 @@ Bridges WebSocket connections from browser to LSP stdio
 
 import asyncio
 import json
+import os
 import subprocess
 import sys
-from pathlib import Path
 
 try:
     import websockets
@@ -16,16 +16,46 @@ except ImportError:
     print("ERROR: websockets module not found. Install with: pip install websockets", file=sys.stderr)
     sys.exit(1)
 
+# orjson is optional: it parses bytes directly and encodes straight to bytes
+try:
+    import orjson
+
+    json_loads = orjson.loads
+    json_dumps = orjson.dumps
+except ImportError:
+    json_loads = json.loads
+
+    def json_dumps(obj):
+        return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+# Set LF_BRIDGE_DEBUG=1 to log a preview of every message
+LOG_LSP = os.environ.get("LF_BRIDGE_DEBUG") == "1"
+
+# Browser and bridge talk over loopback, where permessage-deflate only costs
+# CPU. Set LF_BRIDGE_COMPRESSION=1 to re-enable it for remote deployments.
+COMPRESSION = "deflate" if os.environ.get("LF_BRIDGE_COMPRESSION") == "1" else None
+
+# LSP base protocol header, matched against raw bytes
+CONTENT_LENGTH = b"Content-Length:"
+
+# Only wait for LSP stdin to drain once this much output is buffered
+STDIN_HIGH_WATER = 2**16
+
+# Messages queued per client before it is considered too slow and dropped
+CLIENT_QUEUE_SIZE = 256
+
 
 class LSPBridge:
     def __init__(self, lsp_jar_path):
         self.lsp_jar_path = lsp_jar_path
         self.lsp_process = None
-        self.clients = set()
+        self.clients = []
+        self._loop = None
 
     async def start_lsp(self):
         """Start the LSP server process"""
         print(f"Starting LSP server: {self.lsp_jar_path}", file=sys.stderr)
+        self._loop = asyncio.get_running_loop()
         self.lsp_process = await asyncio.create_subprocess_exec(
             "java", "-Xmx2G", "-jar", self.lsp_jar_path,
             stdin=asyncio.subprocess.PIPE,
@@ -35,47 +65,43 @@ class LSPBridge:
         print("LSP server started", file=sys.stderr)
 
         # Start reading LSP output
-        asyncio.create_task(self.read_lsp_output())
-        asyncio.create_task(self.read_lsp_errors())
+        self._loop.create_task(self.read_lsp_output())
+        self._loop.create_task(self.read_lsp_errors())
 
     async def read_lsp_output(self):
         """Read LSP stdout and broadcast to all connected clients"""
+        # Bound once; these are looked up on every message otherwise
+        stdout = self.lsp_process.stdout
+        readuntil = stdout.readuntil
+        readexactly = stdout.readexactly
+        broadcast = self.broadcast
+        header_len = len(CONTENT_LENGTH)
+
         while True:
             try:
-                # Read Content-Length header
-                header = await self.lsp_process.stdout.readline()
-                if not header:
+                # Read the whole header block, up to and including the blank line
+                try:
+                    header = await readuntil(b'\r\n\r\n')
+                except asyncio.IncompleteReadError:
                     print("LSP stdout closed", file=sys.stderr)
                     break
 
-                header = header.decode('utf-8').strip()
-
-                # Skip empty lines
-                if not header:
-                    continue
-
-                if not header.startswith('Content-Length:'):
-                    print(f"Unexpected header: {header}", file=sys.stderr)
+                start = header.find(CONTENT_LENGTH)
+                if start < 0:
+                    print(f"Unexpected header: {header!r}", file=sys.stderr)
                     continue
 
-                content_length = int(header.split(':')[1].strip())
-
-                # Read empty line
-                await self.lsp_process.stdout.readline()
+                # int() accepts ASCII bytes and ignores surrounding whitespace
+                start += header_len
+                content_length = int(header[start:header.find(b'\r\n', start)])
 
                 # Read content
-                content = await self.lsp_process.stdout.read(content_length)
-                message = json.loads(content.decode('utf-8'))
+                content = await readexactly(content_length)
 
-                print(f"LSP → Client: {json.dumps(message)[:200]}...", file=sys.stderr)
+                if LOG_LSP:
+                    print(f"LSP → Client: {content[:200].decode('utf-8', 'replace')}...", file=sys.stderr)
 
-                # Broadcast to all connected WebSocket clients
-                if self.clients:
-                    message_str = json.dumps(message)
-                    await asyncio.gather(*[
-                        client.send(message_str)
-                        for client in self.clients
-                    ], return_exceptions=True)
+                await broadcast(content)
 
             except Exception as e:
                 print(f"Error reading LSP output: {e}", file=sys.stderr)
@@ -83,14 +109,55 @@ class LSPBridge:
                 traceback.print_exc(file=sys.stderr)
                 break
 
+    async def broadcast(self, content):
+        """Queue an LSP message body for every connected client"""
+        clients = self.clients
+        if not clients:
+            return
+
+        message_str = content.decode('utf-8')
+        slow = []
+        for client in clients:
+            try:
+                client[1].put_nowait(message_str)
+            except asyncio.QueueFull:
+                slow.append(client)
+
+        for websocket, queue in slow:
+            print(f"Client too slow, disconnecting: {websocket.remote_address}", file=sys.stderr)
+            clients.remove((websocket, queue))
+            self._loop.create_task(websocket.close(1013, "client too slow"))
+
+        # A burst already sitting in the stdout buffer is read without ever
+        # yielding, so give the writer tasks a turn after every message
+        await asyncio.sleep(0)
+
+    async def write_client(self, websocket, queue):
+        """Send queued messages to a WebSocket client"""
+        while True:
+            message_str = await queue.get()
+            try:
+                await websocket.send(message_str)
+            except websockets.exceptions.ConnectionClosed:
+                break
+
     async def read_lsp_errors(self):
         """Read LSP stderr for logging"""
+        # Pass lines through as bytes when stderr has a binary buffer; a
+        # replaced text-only stream gets them decoded instead
+        stderr = getattr(sys.stderr, 'buffer', None)
         while True:
             try:
                 line = await self.lsp_process.stderr.readline()
                 if not line:
                     break
-                print(f"LSP: {line.decode('utf-8').strip()}", file=sys.stderr)
+                if not line.endswith(b'\n'):
+                    line += b'\n'
+                if stderr is not None:
+                    stderr.write(b"LSP: " + line)
+                    stderr.flush()
+                else:
+                    sys.stderr.write(f"LSP: {line.decode('utf-8', 'replace')}")
             except Exception as e:
                 print(f"Error reading LSP errors: {e}", file=sys.stderr)
                 break
@@ -98,15 +165,19 @@ class LSPBridge:
     async def send_to_lsp(self, message):
         """Send message to LSP stdin"""
         try:
-            print(f"Client → LSP: {json.dumps(message)[:200]}...", file=sys.stderr)
+            content_bytes = json_dumps(message)
 
-            content = json.dumps(message)
-            content_bytes = content.encode('utf-8')
-            header = f"Content-Length: {len(content_bytes)}\r\n\r\n"
+            if LOG_LSP:
+                print(f"Client → LSP: {content_bytes[:200].decode('utf-8', 'replace')}...", file=sys.stderr)
 
-            self.lsp_process.stdin.write(header.encode('utf-8'))
-            self.lsp_process.stdin.write(content_bytes)
-            await self.lsp_process.stdin.drain()
+            header = b"Content-Length: %d\r\n\r\n" % len(content_bytes)
+
+            stdin = self.lsp_process.stdin
+            stdin.writelines((header, content_bytes))
+            # write() silently drops data once the LSP has exited; drain()
+            # is what raises, so always call it when the pipe is closing
+            if stdin.is_closing() or stdin.transport.get_write_buffer_size() > STDIN_HIGH_WATER:
+                await stdin.drain()
 
         except Exception as e:
             print(f"Error sending to LSP: {e}", file=sys.stderr)
@@ -116,12 +187,14 @@ class LSPBridge:
     async def handle_client(self, websocket):
         """Handle WebSocket client connection"""
         print(f"Client connected: {websocket.remote_address}", file=sys.stderr)
-        self.clients.add(websocket)
+        client = (websocket, asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE))
+        self.clients.append(client)
+        writer = self._loop.create_task(self.write_client(*client))
 
         try:
             async for message_str in websocket:
                 try:
-                    message = json.loads(message_str)
+                    message = json_loads(message_str)
                     await self.send_to_lsp(message)
                 except json.JSONDecodeError as e:
                     print(f"Invalid JSON from client: {e}", file=sys.stderr)
@@ -131,14 +204,22 @@ class LSPBridge:
         except websockets.exceptions.ConnectionClosed:
             print(f"Client disconnected: {websocket.remote_address}", file=sys.stderr)
         finally:
-            self.clients.remove(websocket)
+            writer.cancel()
+            # Already gone if broadcast() dropped it as too slow
+            if client in self.clients:
+                self.clients.remove(client)
 
     async def run(self, host='127.0.0.1', port=5007):
         """Run the WebSocket bridge server"""
         await self.start_lsp()
 
         print(f"Starting WebSocket server on ws://{host}:{port}", file=sys.stderr)
-        async with websockets.serve(self.handle_client, host, port):
+        async with websockets.serve(
+            self.handle_client, host, port,
+            compression=COMPRESSION,
+            max_size=2**23,  # didOpen/didChange from the browser carry whole files
+            write_limit=2**20,
+        ):
             print(f"WebSocket bridge ready on ws://{host}:{port}", file=sys.stdout, flush=True)
             await asyncio.Future()  # Run forever
 
@@ -156,7 +237,7 @@ async def main():
     lsp_jar_path = sys.argv[1]
     port = int(sys.argv[2]) if len(sys.argv) > 2 else 5007
 
-    if not Path(lsp_jar_path).exists():
+    if not os.path.isfile(lsp_jar_path):
         print(f"ERROR: LSP JAR not found: {lsp_jar_path}", file=sys.stderr)
         sys.exit(1)
 
@@ -171,4 +252,20 @@ async def main():
 
 
 if __name__ == '__main__':
-    asyncio.run(main())
+    run = asyncio.run
+
+    # uvloop is optional and not available on Windows
+    if sys.platform != 'win32':
+        try:
+            import uvloop
+        except ImportError:
+            uvloop = None
+
+        if uvloop is not None:
+            if hasattr(uvloop, 'run'):
+                run = uvloop.run
+            else:
+                # uvloop < 0.18 has no run()
+                asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
+    run(main())
@@ -0,0 +1,115 @@
+"""Tests for the WebSocket ↔ LSP stdio bridge."""
+
+import asyncio
+import importlib.util
+import types
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("websockets")
+
+BRIDGE_PATH = Path(__file__).resolve().parent.parent / "lua" / "lf" / "websocket_bridge.py"
+spec = importlib.util.spec_from_file_location("websocket_bridge", BRIDGE_PATH)
+websocket_bridge = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(websocket_bridge)
+
+
+class FakeWebSocket:
+    """Stands in for a connected browser; stays open until closed."""
+
+    remote_address = ("127.0.0.1", 0)
+
+    def __init__(self, send_delay=0.0):
+        self.send_delay = send_delay
+        self.received = []
+        self.close_code = None
+        self.closed = asyncio.Event()
+
+    async def send(self, message):
+        if self.send_delay:
+            await asyncio.sleep(self.send_delay)
+        self.received.append(message)
+
+    async def close(self, code=1000, reason=""):
+        self.close_code = code
+        self.closed.set()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        await self.closed.wait()
+        raise StopAsyncIteration
+
+
+def lsp_frames(count):
+    """Encode `count` small LSP notifications as one chunk of stdout"""
+    frames = []
+    for i in range(count):
+        body = b'{"jsonrpc":"2.0","method":"$/progress","params":{"value":%d}}' % i
+        frames.append(b"Content-Length: %d\r\n\r\n" % len(body) + body)
+    return b"".join(frames)
+
+
+async def bridge_burst(clients, count):
+    """Feed one buffered burst through a bridge and return it once read"""
+    bridge = websocket_bridge.LSPBridge("unused.jar")
+    bridge._loop = asyncio.get_running_loop()
+    stdout = asyncio.StreamReader()
+    bridge.lsp_process = types.SimpleNamespace(stdout=stdout)
+
+    handlers = [bridge._loop.create_task(bridge.handle_client(c)) for c in clients]
+    await asyncio.sleep(0)
+
+    stdout.feed_data(lsp_frames(count))
+    stdout.feed_eof()
+    await bridge.read_lsp_output()
+    return bridge, handlers
+
+
+def test_buffered_burst_reaches_fast_client():
+    async def run():
+        client = FakeWebSocket()
+        bridge, handlers = await bridge_burst([client], 1000)
+        # Let the writer drain what is still queued
+        for _ in range(10):
+            await asyncio.sleep(0)
+
+        assert client.close_code is None
+        assert len(client.received) == 1000
+        assert client.received[-1].endswith('"value":999}}')
+
+        await client.close()
+        await asyncio.gather(*handlers)
+        assert bridge.clients == []
+
+    asyncio.run(run())
+
+
+def test_slow_client_is_dropped_without_delaying_reader(monkeypatch):
+    monkeypatch.setattr(websocket_bridge, "CLIENT_QUEUE_SIZE", 4)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        fast = FakeWebSocket()
+        slow = FakeWebSocket(send_delay=0.05)
+
+        started = loop.time()
+        bridge, handlers = await bridge_burst([fast, slow], 400)
+        # 400 sends at the slow client's pace would take 20 s
+        assert loop.time() - started < 1.0
+
+        for _ in range(10):
+            await asyncio.sleep(0)
+
+        assert slow.close_code == 1013
+        assert fast.close_code is None
+        assert len(fast.received) == 400
+        await asyncio.wait_for(handlers[1], 1)
+
+        await fast.close()
+        await handlers[0]
+        assert bridge.clients == []
+
+    asyncio.run(run())
@@ -28,18 +28,21 @@ NAME_MAP = {
     "IPV6Seg": "ipv6_seg",
 }
 
+# Lowercase/digit followed by uppercase: fooBar -> foo_Bar
+_LOWER_UPPER_RE = re.compile(r"([a-z0-9])([A-Z])")
+# Uppercase run followed by a capitalized word: IPV4Addr -> IPV4_Addr
+_ACRONYM_RE = re.compile(r"([A-Z]+)([A-Z][a-z])")
+
 
 def pascal_to_snake(name: str) -> str:
     """Convert PascalCase to snake_case."""
     # Insert underscore before uppercase letters preceded by lowercase
-    s = re.sub(r"([a-z0-9])([A-Z])", r"\1_\2", name)
+    s = _LOWER_UPPER_RE.sub(r"\1_\2", name)
     # Insert underscore between consecutive uppercase and following lowercase
-    s = re.sub(r"([A-Z]+)([A-Z][a-z])", r"\1_\2", s)
+    s = _ACRONYM_RE.sub(r"\1_\2", s)
     return s.lower()
 
 
 def xtext_to_ts(name: str) -> str:
     """Convert an Xtext rule name to a tree-sitter rule name."""
-    if name in NAME_MAP:
-        return NAME_MAP[name]
-    return pascal_to_snake(name)
+    return NAME_MAP.get(name) or pascal_to_snake(name)